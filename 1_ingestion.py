@@ -6,7 +6,11 @@ from datetime import datetime, timedelta
 
 from faker import Faker
 
-from utils import Sale, Review
+from utils import Sale, Review, check_compression, open_bronze
+
+# Compression des fichiers Bronze : "" (aucune), "gz" ou "zst"
+COMPRESSION = os.environ.get("BRONZE_COMPRESSION", "")
+check_compression(COMPRESSION)
 
 
 def remove_files_from_dir(dir_name: str):
@@ -35,13 +39,16 @@ def create_sales_data(nb_files: int, faker) -> list[int]:
     for f in range(nb_files):
         date_of_file = (datetime.now() - timedelta(days=f)).strftime("%m-%d-%Y")
         nb_sales = random.randint(3,10)
-        with open("./bronze/sales_data_"+date_of_file+".csv","w") as file:
-            file.write("product_id,price,date,client\n")
+        file_name = "./bronze/sales_data_"+date_of_file+".csv"
+        if COMPRESSION:
+            file_name += "." + COMPRESSION
+        with open_bronze(file_name, "wb", COMPRESSION) as file:
+            file.write(b"product_id,price,date,client\n")
 
             for p in range(nb_sales):
                 sale = create_sale(f,p,date_of_file, faker)
 
-                file.write(sale.to_csv_line())
+                file.write(sale.to_csv_line().encode("utf-8"))
                 product_ids.append(sale.product_id)
 
     return product_ids
@@ -56,15 +63,20 @@ def create_review_data(product_ids: list[int], nb_files: int, faker):
         date_of_file = (datetime.now() - timedelta(days=f)).strftime("%m-%d-%Y")
         nb_reviews = random.randint(3,10)
 
-        with open("./bronze/review_data_"+date_of_file+".json","w") as file:
-
-            reviews = []
-            for r in range(nb_reviews):
-                p_id = random.choice(product_ids)
-                review = create_review(p_id, faker)
-                reviews.append(review.to_json())
-
-            json.dump(reviews, file, ensure_ascii=False, indent=4)
+        reviews = []
+        for r in range(nb_reviews):
+            p_id = random.choice(product_ids)
+            review = create_review(p_id, faker)
+            reviews.append(review.to_json())
+
+        if COMPRESSION:
+            # Fichiers compressés : un avis JSON par ligne (ndjson), lisible en flux
+            with open_bronze("./bronze/review_data_"+date_of_file+".ndjson."+COMPRESSION, "wb", COMPRESSION) as file:
+                for review in reviews:
+                    file.write((json.dumps(review, ensure_ascii=False) + "\n").encode("utf-8"))
+        else:
+            with open("./bronze/review_data_"+date_of_file+".json","w") as file:
+                json.dump(reviews, file, ensure_ascii=False, indent=4)
 
 def create_data():
     faker = Faker()
@@ -1,21 +1,24 @@
 """Script de transformation : Nettoie les données et convertit en Parquet"""
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from utils import list_bronze_files, open_bronze
+
 os.makedirs("silver", exist_ok=True)
 
 # =========================
 # TRAITEMENT DES VENTES
 # =========================
 
-# Lister tous les fichiers CSV de ventes dans bronze
-sales_files = Path("bronze").glob("sales_data_*.csv")
-
-dfs_sales = []
-
-for file in sales_files:
-    df = pd.read_csv(file, header=None, names=["product_id", "price", "date", "client"])
+def clean_sales_file(file: Path) -> pd.DataFrame:
+    if file.suffix == ".parquet":
+        df = pd.read_parquet(file)
+    else:
+        # La décompression se fait en flux, directement dans le parseur CSV
+        with open_bronze(file) as stream:
+            df = pd.read_csv(stream, header=None, names=["product_id", "price", "date", "client"])
     df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
 
     # Nettoyage par fichier
@@ -37,8 +40,12 @@ for file in sales_files:
     
     df = df.dropna(subset=["id_prod", "prix", "date_vente"])
     df = df[["id_prod", "prix", "date_vente", "id_client"]]
+    return df
 
-    dfs_sales.append(df)
+
+# Les fichiers sont lus et décompressés en parallèle (pyarrow et le parseur CSV libèrent le GIL)
+with ThreadPoolExecutor() as executor:
+    dfs_sales = list(executor.map(clean_sales_file, list_bronze_files("sales_data")))
 
 # Fusion de tous les fichiers
 if len(dfs_sales) == 0:
@@ -55,12 +62,18 @@ print(f"✅ {len(dfs_sales)} fichiers CSV fusionnés")
 print(f"📦 {len(df_sales_final)} lignes finales")
 
 
-review_files = Path("bronze").glob("review_data_*.json")
-
-dfs_reviews = []
+# =========================
+# TRAITEMENT DES AVIS
+# =========================
 
-for file in review_files:
-    df = pd.read_json(file)
+def clean_review_file(file: Path) -> pd.DataFrame:
+    if file.suffix == ".parquet":
+        df = pd.read_parquet(file)
+    else:
+        # Fichiers .ndjson : un avis par ligne, lisible en flux
+        lines = ".ndjson" in file.suffixes
+        with open_bronze(file) as stream:
+            df = pd.read_json(stream, lines=lines)
     df = df.drop_duplicates()
     df = df.rename(columns={
         "product_id": "id_prod",
@@ -72,7 +85,11 @@ for file in review_files:
     
     df = df.dropna(subset=["id_prod", "note"])
     df = df[["id_prod", "note"]]
-    dfs_reviews.append(df)
+    return df
+
+
+with ThreadPoolExecutor() as executor:
+    dfs_reviews = list(executor.map(clean_review_file, list_bronze_files("review_data")))
 
 if len(dfs_reviews) == 0:
     raise ValueError("Aucun fichier JSON d'avis trouve dans bronze/")
@@ -0,0 +1,267 @@
+"""Script de compaction : Fusionne les petits fichiers de Bronze et Silver en Parquet"""
+import argparse
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from utils import (
+    BRONZE_PATTERNS, COMPACT_MARKER, bronze_candidates, bronze_manifest, list_bronze_files,
+    list_silver_files, open_bronze, read_manifest, silver_candidates, silver_manifest,
+)
+
+SALES_COLUMNS = ["product_id", "price", "date", "client"]
+
+
+def read_bronze_file(path: Path) -> pa.Table:
+    """
+    Lit un fichier Bronze brut (CSV, JSON ou NDJSON, compressé ou non, ou Parquet déjà compacté)
+    :param path: le chemin du fichier
+    :return: une table Arrow, colonnes conservées telles quelles
+    """
+    if path.suffix == ".parquet":
+        return pq.read_table(path)
+    if ".csv" in path.suffixes:
+        # Les valeurs restent des chaînes brutes : le nettoyage est fait par 2_transformation.py
+        with open_bronze(path) as stream:
+            return pacsv.read_csv(
+                stream,
+                read_options=pacsv.ReadOptions(column_names=SALES_COLUMNS, skip_rows=1),
+                convert_options=pacsv.ConvertOptions(
+                    column_types={c: pa.string() for c in SALES_COLUMNS}
+                ),
+            )
+    with open_bronze(path) as file:
+        if ".ndjson" in path.suffixes:
+            return pa.Table.from_pylist([json.loads(line) for line in file.read().splitlines() if line.strip()])
+        return pa.Table.from_pylist(json.loads(file.read()))
+
+
+def read_files(files: list[Path], reader) -> pa.Table:
+    """Lit et concatène une liste de fichiers"""
+    return pa.concat_tables([reader(f) for f in files], promote_options="default")
+
+
+def scan_time(files: list[Path], reader, repeat: int) -> float:
+    """
+    Mesure le temps de lecture d'une liste de fichiers
+    :return: le meilleur temps sur `repeat` passes, après une passe de chauffe non mesurée
+    """
+    # La première lecture paie l'initialisation paresseuse de pyarrow : elle n'est pas comptée
+    read_files(files, reader)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_files(files, reader)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def file_schema(path: Path) -> pa.Schema:
+    if path.suffix == ".parquet":
+        return pq.read_schema(path)
+    return read_bronze_file(path).schema
+
+
+def iter_file_batches(path: Path):
+    """Lit un fichier par record batches : seul un petit fichier brut ou un batch Parquet est en mémoire"""
+    if path.suffix != ".parquet":
+        yield from read_bronze_file(path).to_batches()
+        return
+    parquet_file = pq.ParquetFile(path)
+    try:
+        yield from parquet_file.iter_batches()
+    finally:
+        parquet_file.close()
+
+
+def write_compacted(files: list[Path], out_dir: Path, basename: str, args, written: list[Path]):
+    """
+    Fusionne des fichiers en flux dans out_dir/<basename>-N.parquet
+    Un nouveau fichier est commencé dès que la taille écrite sur le disque atteint args.target_size_mb ;
+    les lignes sont regroupées en row groups de args.row_group_size lignes.
+    :param written: liste complétée au fur et à mesure avec les fichiers créés
+    """
+    target_bytes = args.target_size_mb * 1024 * 1024
+    schema = file_schema(files[0])
+    buffer, buffered = [], 0
+    sink = writer = None
+
+    def flush():
+        nonlocal sink, writer, buffer, buffered
+        if writer is None:
+            path = out_dir / f"{basename}-{len(written)}.parquet"
+            written.append(path)
+            sink = pa.OSFile(str(path), "wb")
+            writer = pq.ParquetWriter(sink, schema, compression="zstd",
+                                      compression_level=args.compression_level)
+        writer.write_table(pa.concat_tables(buffer), row_group_size=args.row_group_size)
+        buffer, buffered = [], 0
+        if sink.tell() >= target_bytes:
+            writer.close()
+            sink.close()
+            writer = None
+
+    try:
+        for f in files:
+            for batch in iter_file_batches(f):
+                buffer.append(pa.Table.from_batches([batch]).select(schema.names).cast(schema))
+                buffered += batch.num_rows
+                if buffered >= args.row_group_size:
+                    flush()
+        if buffer:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+            sink.close()
+
+
+def publish_manifest(manifest_path: Path, files: list[str], superseded: list[str]):
+    """Écrit le manifeste à côté puis le met en place avec os.replace, qui est atomique"""
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"files": sorted(files), "superseded": sorted(superseded)}, file, indent=2)
+        os.replace(tmp_path, manifest_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def cleanup(root: Path, candidates: list[Path], manifest_path: Path):
+    """
+    Supprime les fichiers que le manifeste publié a remplacés, ainsi que les fichiers
+    compactés non publiés (compaction précédente interrompue avant la publication)
+    """
+    manifest = read_manifest(manifest_path)
+    published = set(manifest["files"])
+    for rel in manifest["superseded"]:
+        (root / rel).unlink(missing_ok=True)
+    for f in candidates:
+        if COMPACT_MARKER in f.name and f.relative_to(root).as_posix() not in published:
+            f.unlink(missing_ok=True)
+    if manifest["superseded"]:
+        publish_manifest(manifest_path, manifest["files"], [])
+
+
+def select_small_files(groups: dict[Path, list[Path]], args) -> dict[Path, list[Path]]:
+    """Garde, par partition, les fichiers sous la taille cible s'ils sont au moins args.min_files"""
+    target_bytes = args.target_size_mb * 1024 * 1024
+    selected = {}
+    for out_dir, files in groups.items():
+        small = [f for f in files if f.stat().st_size < target_bytes]
+        if len(small) >= args.min_files:
+            selected[out_dir] = small
+    return selected
+
+
+def compact_groups(root: Path, groups: dict[Path, list[Path]], manifest_path: Path, prefix: str, args):
+    """
+    Fusionne les petits fichiers de chaque partition puis publie le résultat
+
+    Les nouveaux fichiers portent un nom unique et restent invisibles pour les lecteurs
+    (utils.live_files) tant que le manifeste n'est pas remplacé : aucun fichier ni dossier
+    existant n'est écrasé, et un échec avant la publication laisse le jeu de données intact.
+    """
+    basename = f"{prefix}{COMPACT_MARKER}{uuid.uuid4().hex[:8]}"
+    written = []
+    try:
+        for out_dir, files in groups.items():
+            write_compacted(files, out_dir, basename, args, written)
+
+        merged = {f.relative_to(root).as_posix() for files in groups.values() for f in files}
+        manifest = read_manifest(manifest_path)
+        files = [rel for rel in manifest["files"] if rel not in merged]
+        files += [f.relative_to(root).as_posix() for f in written]
+        superseded = [rel for rel in merged if COMPACT_MARKER not in Path(rel).name]
+        publish_manifest(manifest_path, files, superseded)
+    except BaseException:
+        for f in written:
+            f.unlink(missing_ok=True)
+        raise
+
+
+def report(name: str, nb_before: int, time_before: float, nb_after: int, time_after: float):
+    print(f"📦 {name} : {nb_before} fichiers → {nb_after} fichiers")
+    print(f"   ⏱️  Lecture (meilleur temps) : {time_before * 1000:.1f} ms → {time_after * 1000:.1f} ms")
+
+
+def compact_bronze(bronze_dir: Path, args):
+    """Fusionne les petits fichiers journaliers de Bronze en bronze/<prefix>_compact-*.parquet"""
+    for prefix in BRONZE_PATTERNS:
+        manifest_path = bronze_manifest(prefix, bronze_dir)
+        cleanup(bronze_dir, bronze_candidates(prefix, bronze_dir), manifest_path)
+
+        files = list_bronze_files(prefix, bronze_dir)
+        groups = select_small_files({bronze_dir: files}, args)
+        if not groups:
+            print(f"⏭️  bronze/{prefix} : moins de {args.min_files} petits fichiers, rien à compacter")
+            continue
+
+        time_before = scan_time(files, read_bronze_file, args.repeat)
+        compact_groups(bronze_dir, groups, manifest_path, f"{prefix}_", args)
+        cleanup(bronze_dir, bronze_candidates(prefix, bronze_dir), manifest_path)
+
+        outputs = list_bronze_files(prefix, bronze_dir)
+        time_after = scan_time(outputs, read_bronze_file, args.repeat)
+        report(f"bronze/{prefix}", len(files), time_before, len(outputs), time_after)
+
+
+def compact_silver(silver_dir: Path, args):
+    """Fusionne les petits fichiers des jeux de données Silver partitionnés, partition par partition"""
+    for dataset in sorted(p for p in silver_dir.iterdir() if p.is_dir() and not p.name.startswith(".")):
+        manifest_path = silver_manifest(dataset)
+        cleanup(dataset, silver_candidates(dataset), manifest_path)
+
+        # Les fichiers compactés restent dans leur dossier de partition hive (colonne=valeur)
+        files = list_silver_files(dataset)
+        partitions = {}
+        for f in files:
+            partitions.setdefault(f.parent, []).append(f)
+        groups = select_small_files(partitions, args)
+        if not groups:
+            print(f"⏭️  silver/{dataset.name} : aucune partition avec {args.min_files} petits fichiers")
+            continue
+
+        time_before = scan_time(files, pq.read_table, args.repeat)
+        compact_groups(dataset, groups, manifest_path, "", args)
+        cleanup(dataset, silver_candidates(dataset), manifest_path)
+
+        outputs = list_silver_files(dataset)
+        time_after = scan_time(outputs, pq.read_table, args.repeat)
+        report(f"silver/{dataset.name}", len(files), time_before, len(outputs), time_after)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compaction des petits fichiers Bronze et Silver")
+    parser.add_argument("--layer", choices=["bronze", "silver", "all"], default="all",
+                        help="couche à compacter (défaut : all)")
+    parser.add_argument("--target-size-mb", type=float, default=128,
+                        help="taille cible approximative d'un fichier Parquet en Mo (défaut : 128)")
+    parser.add_argument("--row-group-size", type=int, default=1_000_000,
+                        help="nombre de lignes par row group (défaut : 1 000 000)")
+    parser.add_argument("--compression-level", type=int, default=3,
+                        help="niveau de compression zstd (défaut : 3)")
+    parser.add_argument("--min-files", type=int, default=2,
+                        help="nombre minimal de fichiers sous la taille cible, par partition, pour la compacter (défaut : 2)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="nombre de lectures mesurées pour le temps de lecture avant/après (défaut : 5)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.layer in ("bronze", "all") and Path("bronze").is_dir():
+        compact_bronze(Path("bronze"), args)
+    if args.layer in ("silver", "all") and Path("silver").is_dir():
+        compact_silver(Path("silver"), args)
+    print("compaction terminée")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,157 @@
-"""Script principal : Exécute tout le pipeline Data Lake"""
+"""Script principal : Exécute tout le pipeline Data Lake, ou une seule étape
+
+Les bibliothèques lourdes (pandas, pyarrow, matplotlib, seaborn, Faker) ne sont
+importées que par les scripts des étapes exécutées : `python main.py transform`
+ne charge ni Faker ni matplotlib.
+
+Utilisation :
+    python main.py                  # toutes les étapes
+    python main.py --no-render      # toutes les étapes sauf le dashboard (ou `all --no-render`)
+    python main.py ingest [--compression gz|zst]
+    python main.py transform
+    python main.py compute
+    python main.py render
+"""
+import argparse
+import importlib.util
 import os
 import sys
+import traceback
 from pathlib import Path
 
-def main():
-    print("=" * 60)
-    print("🚀 DÉMARRAGE DU PIPELINE DATA LAKE")
-    print("=" * 60)
-    
-    # Créer les dossiers de l'architecture Médaillon
-    print("\n📁 Création de l'architecture...")
-    os.makedirs("bronze", exist_ok=True)
-    os.makedirs("silver", exist_ok=True)
-    os.makedirs("gold", exist_ok=True)
-    print("   ✅ Bronze, Silver, Gold créés")
-    
-    # Étape 1 : Ingestion
+# Étapes du pipeline : commande -> (titre, script, fichiers requis, message de succès)
+STAGES = {
+    "ingest": ("ÉTAPE 1 : INGESTION → Bronze", "1_ingestion.py", [], "Ingestion terminée"),
+    "transform": ("ÉTAPE 2 : TRANSFORMATION → Silver", "2_transformation.py", [], "Transformation terminée"),
+    "compute": ("ÉTAPE 3 : CALCUL → Gold", "3_calcul.py",
+                ["silver/testFichierCSV.parquet", "silver/testFichierJSON.parquet"], "Calcul terminé"),
+    "render": ("ÉTAPE 4 : VISUALISATION", "4_visualisation.py",
+               ["gold/produits_performance.parquet"], "Visualisation terminée"),
+}
+
+
+def run_stage(name: str):
+    """
+    Exécute le script d'une étape du pipeline, quitte le programme en cas d'erreur
+    :param name: le nom de l'étape (clé de STAGES)
+    """
+    title, script, required_files, success = STAGES[name]
     print("\n" + "=" * 60)
-    print("ÉTAPE 1 : INGESTION → Bronze")
+    print(title)
     print("=" * 60)
-    try:
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("ingestion", "1_ingestion.py")
-        ingestion = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(ingestion)
-        print("   ✅ Ingestion terminée")
-    except ImportError as e:
-        print(f"❌ Erreur d'import : {e}")
-        print("   Vérifiez que toutes les dépendances sont installées (faker, utils.py)")
-        sys.exit(1)
-    except Exception as e:
-        print(f"❌ Erreur lors de l'ingestion : {e}")
-        import traceback
-        traceback.print_exc()
+
+    # Vérifier que les fichiers produits par les étapes précédentes existent
+    if name == "transform" and len(list(Path("bronze").glob("*"))) == 0:
+        print("❌ Aucun fichier trouvé dans bronze/")
+        print("   Assurez-vous que l'étape d'ingestion a fonctionné")
         sys.exit(1)
-    
-    # Étape 2 : Transformation
-    print("\n" + "=" * 60)
-    print("ÉTAPE 2 : TRANSFORMATION → Silver")
-    print("=" * 60)
-    try:
-        # Vérifier que des fichiers existent dans bronze
-        bronze_files = list(Path("bronze").glob("*"))
-        if len(bronze_files) == 0:
-            print("❌ Aucun fichier trouvé dans bronze/")
-            print("   Assurez-vous que l'étape d'ingestion a fonctionné")
+    for file in required_files:
+        if not Path(file).exists():
+            print(f"❌ Fichier {file} introuvable")
             sys.exit(1)
-        
-        spec = importlib.util.spec_from_file_location("transformation", "2_transformation.py")
-        transformation = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(transformation)
-        print("   ✅ Transformation terminée")
-    except Exception as e:
-        print(f"❌ Erreur lors de la transformation : {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
-    
-    # Étape 3 : Calcul
-    print("\n" + "=" * 60)
-    print("ÉTAPE 3 : CALCUL → Gold")
-    print("=" * 60)
+
     try:
-        # Vérifier que les fichiers Silver existent
-        if not Path("silver/testFichierCSV.parquet").exists():
-            print("❌ Fichier silver/testFichierCSV.parquet introuvable")
-            sys.exit(1)
-        if not Path("silver/testFichierJSON.parquet").exists():
-            print("❌ Fichier silver/testFichierJSON.parquet introuvable")
-            sys.exit(1)
-        
-        spec = importlib.util.spec_from_file_location("calcul", "3_calcul.py")
-        calcul = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(calcul)
-        print("   ✅ Calcul terminé")
-    except Exception as e:
-        print(f"❌ Erreur lors du calcul : {e}")
-        import traceback
-        traceback.print_exc()
+        spec = importlib.util.spec_from_file_location(name, script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        print(f"   ✅ {success}")
+    except ImportError as e:
+        print(f"❌ Erreur d'import : {e}")
+        print("   Vérifiez que toutes les dépendances sont installées (pip install -r requirements.txt)")
         sys.exit(1)
-    
-    # Étape 4 : Visualisation
-    print("\n" + "=" * 60)
-    print("ÉTAPE 4 : VISUALISATION")
-    print("=" * 60)
-    try:
-        # Vérifier que le fichier Gold existe
-        if not Path("gold/produits_performance.parquet").exists():
-            print("❌ Fichier gold/produits_performance.parquet introuvable")
-            sys.exit(1)
-        
-        spec = importlib.util.spec_from_file_location("visualisation", "4_visualisation.py")
-        visualisation = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(visualisation)
-        print("   ✅ Visualisation terminée")
     except Exception as e:
-        print(f"❌ Erreur lors de la visualisation : {e}")
-        import traceback
+        print(f"❌ Erreur lors de l'étape {name} : {e}")
         traceback.print_exc()
         sys.exit(1)
-    
-    # Résumé final
+
+
+def print_summary(rendered: bool):
     print("\n" + "=" * 60)
     print("✅ PIPELINE TERMINÉ AVEC SUCCÈS !")
     print("=" * 60)
     print("\n📊 Fichiers générés :")
-    
+
     # Lister les fichiers créés
-    bronze_files = list(Path("bronze").glob("*"))
-    silver_files = list(Path("silver").glob("*"))
-    gold_files = list(Path("gold").glob("*"))
-    
-    print(f"\n   Bronze ({len(bronze_files)} fichiers) :")
-    for f in bronze_files:
-        print(f"      - {f.name}")
-    
-    print(f"\n   Silver ({len(silver_files)} fichiers) :")
-    for f in silver_files:
-        print(f"      - {f.name}")
-    
-    print(f"\n   Gold ({len(gold_files)} fichiers) :")
-    for f in gold_files:
-        print(f"      - {f.name}")
-    
+    for layer in ("Bronze", "Silver", "Gold"):
+        files = list(Path(layer.lower()).glob("*"))
+        print(f"\n   {layer} ({len(files)} fichiers) :")
+        for f in files:
+            print(f"      - {f.name}")
+
     print("\n🎯 Question analysée :")
     print("   'Est-ce que les produits les plus vendus sont aussi")
     print("    ceux qui ont les meilleures notes ?'")
-    print("\n   → Consultez gold/dashboard_performance.png pour la réponse !")
+    if rendered:
+        print("\n   → Consultez gold/dashboard_performance.png pour la réponse !")
+    else:
+        print("\n   → Lancez 'python main.py render' pour générer gold/dashboard_performance.png")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline Data Lake (Bronze → Silver → Gold)")
+    # Options de `all`, acceptées aussi sans sous-commande : `python main.py --no-render`
+    parser.add_argument("--no-render", action="store_true",
+                        help="n'exécute pas l'étape de visualisation")
+    parser.add_argument("--compression", choices=["gz", "zst"],
+                        help="compresse les fichiers Bronze écrits")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # default=SUPPRESS : une option donnée avant la sous-commande n'est pas écrasée par le défaut de celle-ci
+    ingest = subparsers.add_parser("ingest", help="génère les fichiers bruts dans bronze/")
+    ingest.add_argument("--compression", choices=["gz", "zst"], default=argparse.SUPPRESS,
+                        help="compresse les fichiers Bronze écrits")
+    subparsers.add_parser("transform", help="nettoie Bronze et écrit Silver en Parquet")
+    subparsers.add_parser("compute", help="calcule les indicateurs de Gold")
+    subparsers.add_parser("render", help="génère le dashboard à partir de Gold")
+    all_stages = subparsers.add_parser("all", help="exécute toutes les étapes (défaut)")
+    all_stages.add_argument("--no-render", action="store_true", default=argparse.SUPPRESS,
+                            help="n'exécute pas l'étape de visualisation")
+    all_stages.add_argument("--compression", choices=["gz", "zst"], default=argparse.SUPPRESS,
+                            help="compresse les fichiers Bronze écrits")
+
+    args = parser.parse_args(argv)
+    # Sans sous-commande : même comportement qu'avant, tout le pipeline
+    if args.command is None:
+        args.command = "all"
+    # Les options globales ne doivent pas être ignorées en silence par les autres sous-commandes
+    if args.no_render and args.command != "all":
+        parser.error(f"--no-render ne s'applique qu'à la commande all, pas à {args.command}")
+    if args.compression and args.command not in ("all", "ingest"):
+        parser.error(f"--compression ne s'applique qu'aux commandes all et ingest, pas à {args.command}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.compression:
+        os.environ["BRONZE_COMPRESSION"] = args.compression
+
+    if args.command != "all":
+        os.makedirs("bronze", exist_ok=True)
+        os.makedirs("silver", exist_ok=True)
+        os.makedirs("gold", exist_ok=True)
+        run_stage(args.command)
+        return
+
+    print("=" * 60)
+    print("🚀 DÉMARRAGE DU PIPELINE DATA LAKE")
+    print("=" * 60)
+
+    # Créer les dossiers de l'architecture Médaillon
+    print("\n📁 Création de l'architecture...")
+    os.makedirs("bronze", exist_ok=True)
+    os.makedirs("silver", exist_ok=True)
+    os.makedirs("gold", exist_ok=True)
+    print("   ✅ Bronze, Silver, Gold créés")
+
+    stages = ["ingest", "transform", "compute"]
+    if not args.no_render:
+        stages.append("render")
+    for name in stages:
+        run_stage(name)
+
+    print_summary(rendered=not args.no_render)
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,6 @@
+import json
+from pathlib import Path
+
 class Sale():
     def __init__(self, product_id, price, date, client):
         self.product_id = product_id
@@ -15,4 +18,119 @@ class Review():
         self.product_id = product_id
 
     def to_json(self):
-        return {"grade" : self.grade, "comment" : self.comment, "product_id" : self.product_id}
\ No newline at end of file
+        return {"grade" : self.grade, "comment" : self.comment, "product_id" : self.product_id}
+
+# Compressions acceptées pour les fichiers Bronze : extension -> codec pyarrow ("" = aucune)
+BRONZE_COMPRESSIONS = {"": None, "gz": "gzip", "zst": "zstd"}
+
+# Motifs des fichiers bruts de chaque groupe Bronze, pour toutes les compressions acceptées
+BRONZE_PATTERNS = {
+    "sales_data": [f"sales_data_*.csv{'.' + c if c else ''}" for c in BRONZE_COMPRESSIONS],
+    "review_data": [
+        f"review_data_*.{fmt}{'.' + c if c else ''}" for fmt in ("json", "ndjson") for c in BRONZE_COMPRESSIONS
+    ],
+}
+
+def check_compression(compression: str):
+    """Lève une ValueError si la compression n'est pas "", "gz" ou "zst" """
+    if compression not in BRONZE_COMPRESSIONS:
+        raise ValueError(
+            f"Compression Bronze inconnue : {compression!r} (valeurs acceptées : \"\", \"gz\", \"zst\")"
+        )
+
+def open_bronze(path, mode="rb", compression=None):
+    """
+    Ouvre un fichier Bronze en mode binaire, en (dé)compressant à la volée
+    :param path: le chemin du fichier (.csv, .csv.gz, .csv.zst, .json.zst, ...)
+    :param mode: "rb" pour lire, "wb" pour écrire
+    :param compression: "", "gz" ou "zst" ; si None, déduite de l'extension du fichier lu
+    :return: un flux binaire
+    """
+    if compression is None:
+        if mode != "rb":
+            raise ValueError("La compression doit être indiquée pour écrire un fichier Bronze")
+        suffix = Path(path).suffix.lstrip(".")
+        compression = suffix if suffix in BRONZE_COMPRESSIONS else ""
+    check_compression(compression)
+
+    codec = BRONZE_COMPRESSIONS[compression]
+    if codec is None:
+        return open(path, mode)
+    import pyarrow as pa
+    if mode == "rb":
+        return pa.input_stream(str(path), compression=codec)
+    if mode == "wb":
+        return pa.output_stream(str(path), compression=codec)
+    raise ValueError(f"Mode non supporté : {mode!r} (\"rb\" ou \"wb\")")
+
+# Fichiers écrits par compaction.py : leur nom contient ce marqueur
+COMPACT_MARKER = "compact-"
+
+# Manifeste d'un jeu de données compacté, publié par compaction.py avec os.replace :
+# "files" = fichiers compactés visibles, "superseded" = fichiers fusionnés à ignorer
+def read_manifest(manifest_path) -> dict:
+    """
+    Lit le manifeste d'un jeu de données compacté
+    :param manifest_path: le chemin du manifeste (absent si le jeu n'a jamais été compacté)
+    :return: {"files": [...], "superseded": [...]}, chemins relatifs à la racine du jeu
+    """
+    if not Path(manifest_path).exists():
+        return {"files": [], "superseded": []}
+    with open(manifest_path, encoding="utf-8") as file:
+        return json.load(file)
+
+def live_files(root, candidates, manifest_path) -> list[Path]:
+    """
+    Filtre les fichiers d'un jeu de données selon son manifeste : un fichier compacté n'est
+    visible que s'il est publié dans le manifeste, un autre fichier l'est sauf s'il a été fusionné
+    :param root: la racine du jeu de données
+    :param candidates: les fichiers présents sur le disque
+    :param manifest_path: le chemin du manifeste
+    :return: la liste des fichiers à lire
+    """
+    manifest = read_manifest(manifest_path)
+    published, superseded = set(manifest["files"]), set(manifest["superseded"])
+    live = []
+    for f in candidates:
+        rel = f.relative_to(root).as_posix()
+        if (rel in published) if COMPACT_MARKER in f.name else (rel not in superseded):
+            live.append(f)
+    return sorted(live)
+
+def bronze_manifest(prefix: str, bronze_dir="bronze") -> Path:
+    return Path(bronze_dir) / f"_{prefix}_manifest.json"
+
+def bronze_candidates(prefix: str, bronze_dir="bronze") -> list[Path]:
+    """Fichiers d'un groupe Bronze présents sur le disque : bruts et compactés, visibles ou non"""
+    bronze_dir = Path(bronze_dir)
+    patterns = BRONZE_PATTERNS[prefix] + [f"{prefix}_{COMPACT_MARKER}*.parquet"]
+    return sorted({f for p in patterns for f in bronze_dir.glob(p)})
+
+def list_bronze_files(prefix: str, bronze_dir="bronze") -> list[Path]:
+    """
+    Liste les fichiers Bronze d'un groupe : fichiers bruts pas encore fusionnés
+    et fichiers Parquet publiés par compaction.py
+    :param prefix: le préfixe du groupe ("sales_data" ou "review_data")
+    :return: la liste des fichiers à lire
+    """
+    return live_files(bronze_dir, bronze_candidates(prefix, bronze_dir), bronze_manifest(prefix, bronze_dir))
+
+def silver_manifest(dataset) -> Path:
+    return Path(dataset) / "_manifest.json"
+
+def silver_candidates(dataset) -> list[Path]:
+    """Fichiers Parquet d'un jeu de données Silver (partitions comprises), hors fichiers cachés"""
+    dataset = Path(dataset)
+    return sorted(
+        f for f in dataset.rglob("*.parquet")
+        if not any(part.startswith((".", "_")) for part in f.relative_to(dataset).parts)
+    )
+
+def list_silver_files(dataset) -> list[Path]:
+    """
+    Liste les fichiers à lire d'un jeu de données Silver partitionné, en tenant compte
+    du manifeste de compaction.py (à utiliser plutôt que de lire le dossier directement)
+    :param dataset: le dossier du jeu de données
+    :return: la liste des fichiers à lire
+    """
+    return live_files(dataset, silver_candidates(dataset), silver_manifest(dataset))